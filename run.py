@@ -1,12 +1,102 @@
 import requests
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 import pandas as pd
+import numpy as np
 import time
 import random
 from datetime import datetime
 import json
+import argparse
+import threading
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None
+
+# Upper bound on concurrent page fetches, independent of --workers
+_MAX_REQUESTS = 2
+
+# Strips currency, thousands separators and "more than" markers in one pass
+_CLEAN = str.maketrans('', '', '$+,')
+
+def _slug(keyword):
+    """Returns the filename stem used for a keyword's reports"""
+    return keyword.replace(' ', '_').lower()
+
+def _parse_price(text):
+    """Parses a scraped price such as '$1,200' into a float"""
+    return float(text.translate(_CLEAN))
+
+def _parse_orders(text):
+    """Parses a scraped order count such as '1K+' into an int"""
+    return int(text.translate(_CLEAN).replace('K', '000'))
+
+@dataclass(eq=False)
+class Gigs:
+    """Column-oriented view of scraped gigs, one ndarray per analyzed field"""
+    price: np.ndarray
+    orders: np.ndarray
+    rating: np.ndarray
+    
+    def __len__(self):
+        return len(self.price)
+
+def _gigs_to_soa(gigs):
+    """Converts scraped gig dicts into a Gigs container"""
+    count = len(gigs)
+    return Gigs(
+        price=np.fromiter((gig['price_value'] for gig in gigs), dtype=float, count=count),
+        orders=np.fromiter((gig['order_count'] for gig in gigs), dtype=np.int64, count=count),
+        rating=np.fromiter((gig['rating_value'] for gig in gigs), dtype=float, count=count)
+    )
+
+def _extract_gig(gig):
+    """Extracts one gig dict from a gig-card node"""
+    # Basic gig info
+    title = gig.css_first('h3').text().strip()
+    seller = gig.css_first('div.seller-name').text().strip()
+    rating = gig.css_first('span.rating').text().strip() or '0'
+    orders = gig.css_first('span.orders').text().strip() or '0'
+    price = gig.css_first('span.price').text().strip() or '$0'
+    
+    # Level and badges (if available)
+    level = gig.css_first('span.level')
+    level = level.text().strip() if level else 'New Seller'
+    
+    return {
+        'title': title,
+        'seller': seller,
+        'rating': rating,
+        'orders': orders,
+        'price': price,
+        'level': level,
+        'price_value': _parse_price(price),
+        'order_count': _parse_orders(orders),
+        'rating_value': float(rating)
+    }
+
+def _iter_gigs(html):
+    """Yields gig dicts from a search results page, skipping malformed cards"""
+    tree = LexborHTMLParser(html)
+    
+    # Adjust selectors as needed
+    for node in tree.css('div.gig-card'):
+        try:
+            gig = _extract_gig(node)
+        except (AttributeError, ValueError):
+            continue
+        yield gig
+
 class MarketIntelligence:
     def __init__(self):
         self.headers = {
@@ -18,13 +108,34 @@ class MarketIntelligence:
             'fiverr': 'https://www.fiverr.com/search/gigs?query=',
             'upwork': 'https://www.upwork.com/search/jobs/?q='
         }
+        self._local = threading.local()
+        self._sem = threading.BoundedSemaphore(_MAX_REQUESTS)
         
+    def _session(self):
+        """Returns this thread's requests session, creating it on first use"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            self._local.session = session
+        return session
+
     def safe_request(self, url):
         """Makes safe requests with random delays"""
         try:
-            delay = random.uniform(2, 4)
-            time.sleep(delay)
-            response = requests.get(url, headers=self.headers)
+            session = self._session()
+            
+            # Pages already on disk skip the politeness delay entirely
+            if requests_cache is not None and isinstance(session, requests_cache.CachedSession):
+                response = session.get(url, only_if_cached=True)
+                if response.status_code == 200:
+                    return response.text
+                    
+            # At most _MAX_REQUESTS fetches run at once, however many workers
+            with self._sem:
+                delay = random.uniform(2, 4)
+                time.sleep(delay)
+                response = session.get(url)
             if response.status_code == 200:
                 return response.text
             return None
@@ -32,11 +143,10 @@ class MarketIntelligence:
             print(f"Error accessing {url}: {e}")
             return None
 
-    def analyze_competition(self, data):
+    def analyze_competition(self, gigs):
         """Analyzes competition level based on multiple factors"""
-        total_sellers = len(data)
-        total_orders = sum(int(gig.get('orders', '0').replace('K', '000').replace('+', '')) for gig in data)
-        avg_rating = sum(float(gig.get('rating', '0')) for gig in data) / total_sellers if total_sellers > 0 else 0
+        total_sellers = len(gigs)
+        avg_rating = float(gigs.rating.mean()) if total_sellers > 0 else 0
         
         # Competition metrics
         if total_sellers == 0:
@@ -61,9 +171,9 @@ class MarketIntelligence:
             'avg_rating': round(avg_rating, 2)
         }
 
-    def analyze_demand(self, data):
+    def analyze_demand(self, gigs):
         """Analyzes market demand based on orders and pricing"""
-        if not data:
+        if not gigs:
             return {
                 'demand_level': 'Unknown',
                 'total_orders': 0,
@@ -71,18 +181,9 @@ class MarketIntelligence:
                 'price_range': {'min': 0, 'max': 0}
             }
             
-        total_orders = sum(int(gig.get('orders', '0').replace('K', '000').replace('+', '')) for gig in data)
-        prices = [float(gig.get('price', '0').replace('$', '')) for gig in data if gig.get('price')]
-        
-        if not prices:
-            return {
-                'demand_level': 'Unknown',
-                'total_orders': total_orders,
-                'avg_price': 0,
-                'price_range': {'min': 0, 'max': 0}
-            }
-            
-        avg_price = sum(prices) / len(prices)
+        prices = gigs.price
+        total_orders = int(gigs.orders.sum())
+        avg_price = float(prices.mean())
         
         # Demand calculation
         demand_score = min((total_orders / 1000) * 100, 100)  # Normalize to 100%
@@ -100,8 +201,8 @@ class MarketIntelligence:
             'total_orders': total_orders,
             'avg_price': round(avg_price, 2),
             'price_range': {
-                'min': round(min(prices), 2),
-                'max': round(max(prices), 2)
+                'min': round(float(prices.min()), 2),
+                'max': round(float(prices.max()), 2)
             }
         }
 
@@ -112,35 +213,8 @@ class MarketIntelligence:
         if not html:
             return []
             
-        soup = BeautifulSoup(html, 'html.parser')
-        gigs = []
-        
-        # Find top 10 gigs (adjust selectors as needed)
-        for gig in soup.find_all('div', {'class': 'gig-card'})[:10]:
-            try:
-                # Basic gig info
-                title = gig.find('h3').text.strip()
-                seller = gig.find('div', {'class': 'seller-name'}).text.strip()
-                rating = gig.find('span', {'class': 'rating'}).text.strip() or '0'
-                orders = gig.find('span', {'class': 'orders'}).text.strip() or '0'
-                price = gig.find('span', {'class': 'price'}).text.strip() or '$0'
-                
-                # Level and badges (if available)
-                level = gig.find('span', {'class': 'level'})
-                level = level.text.strip() if level else 'New Seller'
-                
-                gigs.append({
-                    'title': title,
-                    'seller': seller,
-                    'rating': rating,
-                    'orders': orders,
-                    'price': price,
-                    'level': level
-                })
-            except AttributeError:
-                continue
-                
-        return gigs
+        # Top 10 gigs that parse cleanly; later cards are never extracted
+        return list(islice(_iter_gigs(html), 10))
 
     def generate_market_report(self, keyword):
         """Generates comprehensive market report"""
@@ -152,9 +226,10 @@ class MarketIntelligence:
             print(f"No data found for {keyword}")
             return None
             
-        # Analyze market
-        competition_metrics = self.analyze_competition(gigs)
-        demand_metrics = self.analyze_demand(gigs)
+        # Analyze market on columnar data
+        columns = _gigs_to_soa(gigs)
+        competition_metrics = self.analyze_competition(columns)
+        demand_metrics = self.analyze_demand(columns)
         
         # Calculate opportunity score
         opportunity_score = (
@@ -183,14 +258,22 @@ class MarketIntelligence:
         # Create reports directory
         Path('market_reports').mkdir(exist_ok=True)
         
-        # Generate filenames
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        keyword_slug = report['keyword'].replace(' ', '_').lower()
+        # Generate filenames from the report's own timestamp so they match analysis_date
+        analyzed_at = datetime.strptime(report['analysis_date'], '%Y-%m-%d %H:%M:%S')
+        timestamp = analyzed_at.strftime('%Y%m%d_%H%M%S')
+        keyword_slug = _slug(report['keyword'])
         
         # Save detailed JSON report
         json_path = f'market_reports/{keyword_slug}_{timestamp}.json'
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2)
+        if orjson is not None:
+            with open(json_path, 'wb') as f:
+                f.write(orjson.dumps(
+                    report,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                ))
+        else:
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
             
         # Create CSV summary
         summary_data = {
@@ -213,21 +296,63 @@ class MarketIntelligence:
         print(f"Summary: {csv_path}")
 
 def main():
+    parser = argparse.ArgumentParser(description='Fiverr market intelligence reports')
+    parser.add_argument('--keywords-file', help='File with one keyword per line')
+    parser.add_argument('--workers', type=int, default=4,
+                        help=f'Maximum keywords analyzed at once (page fetches are capped at {_MAX_REQUESTS})')
+    parser.add_argument('--interactive', action='store_true',
+                        help='Prompt for keywords (default when no keywords file is given)')
+    parser.add_argument('--no-cache', action='store_true', help='Always fetch pages from the network')
+    args = parser.parse_args()
+    
+    # Persist successful page fetches on disk for an hour across runs
+    if requests_cache is not None and not args.no_cache:
+        requests_cache.install_cache('market_cache', backend='sqlite',
+                                     expire_after=3600, allowable_codes=(200,))
+    
     analyzer = MarketIntelligence()
+    keywords = []
+    
+    # Get keywords from file
+    if args.keywords_file:
+        with open(args.keywords_file, encoding='utf-8') as f:
+            keywords.extend(line.strip() for line in f if line.strip())
     
     # Get keywords from user
-    print("Enter keywords to analyze (one per line, blank line to finish):")
-    keywords = []
-    while True:
-        keyword = input().strip()
-        if not keyword:
-            break
-        keywords.append(keyword)
+    if args.interactive or not args.keywords_file:
+        print("Enter keywords to analyze (one per line, blank line to finish):")
+        while True:
+            keyword = input().strip()
+            if not keyword:
+                break
+            keywords.append(keyword)
     
-    # Process each keyword
+    # Keywords with the same slug can finish in the same second and would
+    # write to the same files; keep only the first of each
+    unique = {}
     for keyword in keywords:
-        report = analyzer.generate_market_report(keyword)
-        if report:
+        slug = _slug(keyword)
+        if slug in unique:
+            print(f"Skipping '{keyword}': same report files as '{unique[slug]}'")
+            continue
+        unique[slug] = keyword
+    keywords = list(unique.values())
+    
+    if not keywords:
+        return
+        
+    # Process keywords concurrently; each one mostly waits on the network
+    with ThreadPoolExecutor(max_workers=max(1, min(args.workers, len(keywords)))) as executor:
+        futures = {
+            executor.submit(analyzer.generate_market_report, keyword): keyword
+            for keyword in keywords
+        }
+        for future in as_completed(futures):
+            keyword = futures[future]
+            report = future.result()
+            if not report:
+                continue
+
             analyzer.save_report(report)
             
             # Print quick insights